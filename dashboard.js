@@ -3,6 +3,10 @@
 // State
 let allArticles = [];
 let currentFilter = 'all';
+let changeVersion = 0;
+let changeEpoch = '';
+let changeStream = null;
+let statsRefreshTimer = null;
 
 // DOM Elements
 const articlesGrid = document.getElementById('articlesGrid');
@@ -22,6 +26,7 @@ const savedCount = document.getElementById('savedCount');
 
 // Initialize
 document.addEventListener('DOMContentLoaded', () => {
+    loadStats();
     loadArticles();
     setupEventListeners();
 });
@@ -60,13 +65,15 @@ async function loadArticles() {
         const data = await response.json();
 
         allArticles = data.articles || [];
+        changeVersion = data.version || 0;
+        changeEpoch = data.epoch || '';
+        subscribeToChanges();
 
         if (allArticles.length === 0) {
             showEmptyState(true);
         } else {
             showEmptyState(false);
             renderArticles(allArticles);
-            updateStats();
 
             if (data.last_updated) {
                 const date = new Date(data.last_updated);
@@ -98,7 +105,7 @@ async function scrapeArticles() {
 
         if (data.status === 'success') {
             showToast(`Found ${data.articles_found} new articles!`, 'success');
-            await loadArticles();
+            await Promise.all([fetchChanges(), loadStats()]);
         } else {
             showToast('Scraping failed', 'error');
         }
@@ -112,6 +119,82 @@ async function scrapeArticles() {
     }
 }
 
+// Subscribe to the change feed so new and updated articles arrive as diffs
+function subscribeToChanges() {
+    if (!window.EventSource) return;
+    if (changeStream) changeStream.close();
+
+    // On reconnect the browser resumes from the last event ID it received
+    changeStream = new EventSource(`/api/changes/stream?since=${changeVersion}&epoch=${changeEpoch}`);
+    changeStream.addEventListener('change', (e) => {
+        applyChange(JSON.parse(e.data));
+        scheduleStatsRefresh();
+    });
+    changeStream.addEventListener('reset', () => loadArticles());
+}
+
+// Fetch pending changes once (used after a manual refresh)
+async function fetchChanges() {
+    const response = await fetch(`/api/changes?since=${changeVersion}&epoch=${changeEpoch}`);
+    const data = await response.json();
+
+    if (data.reset) {
+        await loadArticles();
+        return;
+    }
+    changeEpoch = data.epoch;
+    data.changes.forEach(applyChange);
+}
+
+// Apply a single change feed entry; already applied versions are ignored
+function applyChange(change) {
+    if (change.epoch !== undefined && change.epoch !== changeEpoch) {
+        changeEpoch = change.epoch;
+        changeVersion = 0;
+    }
+    if (change.version <= changeVersion) return;
+    changeVersion = change.version;
+
+    if (change.type === 'article') {
+        upsertArticle(change.article);
+    } else if (change.type === 'saved') {
+        const article = allArticles.find(a => a.id === change.id);
+        if (article) article.is_saved = change.saved;
+        updateSaveButton(change.id, change.saved);
+
+        if (currentFilter === 'saved') {
+            filterArticles('saved');
+        }
+    }
+}
+
+// Insert a new article or replace an updated one without re-rendering the grid
+function upsertArticle(article) {
+    const index = allArticles.findIndex(a => a.url === article.url);
+    const existingCard = index >= 0
+        ? articlesGrid.querySelector(`[data-id="${allArticles[index].id}"]`)
+        : null;
+
+    if (index >= 0) {
+        allArticles[index] = article;
+    } else {
+        allArticles.unshift(article);
+    }
+
+    if (existingCard) {
+        existingCard.replaceWith(createArticleCard(article));
+    } else if (currentFilter === 'all' || currentFilter === article.source) {
+        showEmptyState(false);
+        articlesGrid.prepend(createArticleCard(article));
+    }
+}
+
+// Refresh stats at most once per burst of changes
+function scheduleStatsRefresh() {
+    clearTimeout(statsRefreshTimer);
+    statsRefreshTimer = setTimeout(loadStats, 500);
+}
+
 // Filter articles
 async function filterArticles(filter) {
     currentFilter = filter;
@@ -228,15 +311,9 @@ async function toggleSave(articleId) {
         if (data.status === 'success') {
             article.is_saved = !article.is_saved;
 
-            // Update the card
-            const card = document.querySelector(`[data-id="${articleId}"]`);
-            if (card) {
-                const saveBtn = card.querySelector('.save-btn');
-                saveBtn.textContent = article.is_saved ? '⭐' : '☆';
-                saveBtn.classList.toggle('saved', article.is_saved);
-            }
+            updateSaveButton(articleId, article.is_saved);
 
-            updateStats();
+            loadStats();
 
             showToast(
                 article.is_saved ? 'Article saved!' : 'Article unsaved',
@@ -255,14 +332,40 @@ async function toggleSave(articleId) {
     }
 }
 
+// Load statistics (maintained server-side, no article list needed)
+async function loadStats() {
+    try {
+        const response = await fetch('/api/stats');
+        const stats = await response.json();
+        updateStats(stats);
+    } catch (error) {
+        console.error('Error loading stats:', error);
+    }
+}
+
+// Update the star on an article card
+function updateSaveButton(articleId, isSaved) {
+    const card = document.querySelector(`[data-id="${articleId}"]`);
+    if (card) {
+        const saveBtn = card.querySelector('.save-btn');
+        saveBtn.textContent = isSaved ? '⭐' : '☆';
+        saveBtn.classList.toggle('saved', isSaved);
+    }
+}
+
 // Update statistics
-function updateStats() {
-    totalArticles.textContent = allArticles.length;
+function updateStats(stats) {
+    const bySource = stats.by_source || {};
 
-    bensBitesCount.textContent = allArticles.filter(a => a.source === 'bens_bites').length;
-    aiRundownCount.textContent = allArticles.filter(a => a.source === 'ai_rundown').length;
-    redditCount.textContent = allArticles.filter(a => a.source === 'reddit').length;
-    savedCount.textContent = allArticles.filter(a => a.is_saved).length;
+    totalArticles.textContent = stats.total || 0;
+    bensBitesCount.textContent = bySource.bens_bites || 0;
+    aiRundownCount.textContent = bySource.ai_rundown || 0;
+    redditCount.textContent = bySource.reddit || 0;
+    savedCount.textContent = stats.saved || 0;
+
+    if (window.datePicker) {
+        window.datePicker.setArticleCounts(stats.by_day || {});
+    }
 }
 
 // Helper functions
@@ -15,6 +15,9 @@ class DateWheelPicker {
             'July', 'August', 'September', 'October', 'November', 'December'
         ];
 
+        // Articles per day (YYYY-MM-DD -> count), provided by /api/stats
+        this.articleCounts = {};
+
         this.wheels = {
             day: { currentY: 0, targetY: 0, isDragging: false, startY: 0 },
             month: { currentY: 0, targetY: 0, isDragging: false, startY: 0 },
@@ -320,6 +323,19 @@ class DateWheelPicker {
         });
     }
 
+    setArticleCounts(counts) {
+        this.articleCounts = counts;
+    }
+
+    getArticleCount(date) {
+        const key = [
+            date.getFullYear(),
+            String(date.getMonth() + 1).padStart(2, '0'),
+            String(date.getDate()).padStart(2, '0')
+        ].join('-');
+        return this.articleCounts[key] || 0;
+    }
+
     open() {
         document.getElementById('datePickerOverlay').classList.add('active');
         document.getElementById('datePickerContainer').classList.add('active');
@@ -334,9 +350,12 @@ class DateWheelPicker {
     confirm() {
         const selectedDate = new Date(this.selectedYear, this.selectedMonth, this.selectedDay);
 
+        const articleCount = this.getArticleCount(selectedDate);
+
         const event = new CustomEvent('dateSelected', {
             detail: {
                 date: selectedDate,
+                articleCount,
                 formatted: selectedDate.toLocaleDateString('en-US', {
                     year: 'numeric',
                     month: 'long',
@@ -347,7 +366,7 @@ class DateWheelPicker {
         document.dispatchEvent(event);
 
         if (typeof showToast === 'function') {
-            showToast(`Date selected: ${event.detail.formatted}`, 'success');
+            showToast(`Date selected: ${event.detail.formatted} (${articleCount} articles)`, 'success');
         }
         this.close();
     }
@@ -357,6 +376,7 @@ class DateWheelPicker {
 let datePicker;
 document.addEventListener('DOMContentLoaded', () => {
     datePicker = new DateWheelPicker();
+    window.datePicker = datePicker;
 });
 
 // Make it globally accessible
@@ -2,11 +2,22 @@ import modal
 from modal.volume import Volume
 import sys
 import os
+import importlib
 import json
+import threading
+import time
 from datetime import datetime
-from flask import Flask, jsonify, send_from_directory, request
+from flask import Flask, jsonify, request, Response
 from flask_cors import CORS
 
+# Shared helpers live in tools/ (mounted at /root/tools in the container)
+sys.path.append(os.path.join(os.path.dirname(__file__), 'tools'))
+from write_coalescer import WriteCoalescer, parse_operations, apply_operations
+from article_stats import ArticleStats, update_for_ingest
+from change_feed import ChangeFeed, parse_cursor, sse_stream
+from static_assets import build_assets, send_html, send_asset
+from ranking import SORTS, build_ranking_index, ranked_slice, parse_slice
+
 # --- Configuration ---
 APP_NAME = "ai-news-dashboard"
 VOLUME_NAME = "ai-news-data"
@@ -18,7 +29,7 @@ volume = Volume.from_name(VOLUME_NAME, create_if_missing=True)
 # Image with dependencies
 image = (
     modal.Image.debian_slim()
-    .pip_install("flask", "flask-cors", "requests", "beautifulsoup4")
+    .pip_install("flask", "flask-cors", "requests", "beautifulsoup4", "brotli", "numpy")
     # Add local tools directory
     .add_local_dir("tools", remote_path="/root/tools")
     # Add static files (HTML, CSS, JS)
@@ -29,8 +40,17 @@ image = (
     .add_local_file("date-picker.js", remote_path="/root/date-picker.js")
 )
 
+# Change feed streaming: poll interval and lifetime of one SSE connection
+STREAM_POLL_INTERVAL = 5
+STREAM_MAX_DURATION = 240
+volume_reload_lock = threading.Lock()
+last_volume_reload = 0.0
+
+# Built on web container startup from the files under /root
+STATIC_BUILD_DIR = "/tmp/static"
+
 # --- Flask Attributes ---
-web_app = Flask(__name__, static_folder='/root')
+web_app = Flask(__name__, static_folder=None)
 CORS(web_app)
 
 # In-memory database (populated from volume on request)
@@ -42,6 +62,15 @@ def get_data_path():
 def get_saved_path():
     return "/data/saved_articles.json"
 
+def get_stats_path():
+    return "/data/stats.json"
+
+def get_changes_path():
+    return "/data/changes.json"
+
+def get_ranking_path():
+    return "/data/ranking.json"
+
 def get_details_dir():
     return "/data/details"
 
@@ -70,7 +99,82 @@ def load_saved_ids():
             pass
     return set()
 
-def save_saved_ids(saved_set):
+def load_stats(feed_version):
+    # Stats record the change feed version they were written with; a mismatch
+    # means another writer changed the articles or saved set since
+    path = get_stats_path()
+    if os.path.exists(path):
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            if data.get('feed_version') == feed_version:
+                return ArticleStats(data)
+        except:
+            pass
+    return None
+
+def load_or_rebuild_stats(feed_version):
+    # Rebuilt from the article list when stats.json is missing or out of date
+    stats = load_stats(feed_version)
+    if stats is None:
+        stats = ArticleStats.from_articles(load_articles(), load_saved_ids())
+    return stats
+
+def write_stats(stats, feed):
+    # Written alongside the data it describes; the caller commits the volume
+    with open(get_stats_path(), 'w') as f:
+        json.dump({**stats.to_dict(), 'feed_version': feed.version}, f)
+
+def load_change_feed():
+    path = get_changes_path()
+    if os.path.exists(path):
+        try:
+            with open(path, 'r') as f:
+                return ChangeFeed(json.load(f))
+        except:
+            pass
+    return ChangeFeed()
+
+def write_change_feed(feed):
+    # Like write_stats, committed by the caller together with the data
+    with open(get_changes_path(), 'w') as f:
+        json.dump(feed.to_dict(), f)
+
+def load_ranking_index():
+    path = get_ranking_path()
+    if os.path.exists(path):
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except:
+            pass
+    return {}
+
+def reload_volume(min_interval=0):
+    """
+    Reload the volume unless this container reloaded it in the last
+    ``min_interval`` seconds. Reloads are serialised per container; a failed
+    reload is logged and False is returned.
+    """
+    global last_volume_reload
+    with volume_reload_lock:
+        if time.monotonic() - last_volume_reload < min_interval:
+            return True
+        try:
+            volume.reload()
+        except Exception as e:
+            print(f"Volume reload failed: {e}")
+            return False
+        last_volume_reload = time.monotonic()
+        return True
+
+def wait_for_volume_changes(version, timeout):
+    # Web containers only see other containers' commits after a reload. All
+    # open streams in this container share one reload every few seconds.
+    time.sleep(min(timeout, STREAM_POLL_INTERVAL))
+    reload_volume(STREAM_POLL_INTERVAL)
+
+def save_saved_ids(saved_set, stats=None, feed=None):
     ensure_dirs()
     path = get_saved_path()
     data = {
@@ -79,20 +183,42 @@ def save_saved_ids(saved_set):
     }
     with open(path, 'w') as f:
         json.dump(data, f)
+    if stats is not None:
+        write_stats(stats, feed)
+    if feed is not None:
+        write_change_feed(feed)
     volume.commit()
 
 # --- Routes ---
 @web_app.route('/')
 def index():
-    return send_from_directory('/root', 'dashboard.html')
+    return send_html(STATIC_BUILD_DIR)
 
-@web_app.route('/<path:filename>')
-def serve_static(filename):
-    return send_from_directory('/root', filename)
+@web_app.route('/assets/<path:filename>')
+def serve_asset(filename):
+    return send_asset(STATIC_BUILD_DIR, filename, request.headers.get('Accept-Encoding', ''))
 
 @web_app.route('/api/articles')
 def get_articles_api():
+    sort = request.args.get('sort')
+    if sort is not None and sort not in SORTS:
+        return jsonify({'status': 'error', 'message': f"sort must be one of: {', '.join(SORTS)}"}), 400
+    try:
+        offset, limit = parse_slice(request.args.get('offset'), request.args.get('limit'))
+    except ValueError:
+        return jsonify({'status': 'error', 'message': 'offset and limit must be non-negative integers'}), 400
+
+    feed = load_change_feed()
+    epoch, version = feed.epoch, feed.version
     articles = load_articles()
+    # Only ranked requests need the index
+    articles = ranked_slice(
+        articles,
+        load_ranking_index() if sort else {},
+        sort,
+        offset,
+        limit
+    )
     saved_ids = load_saved_ids()
     
     # Enrich with is_saved status
@@ -106,9 +232,38 @@ def get_articles_api():
     return jsonify({
         'articles': result,
         'total': len(result),
-        'source': 'modal_volume'
+        'source': 'modal_volume',
+        'version': version,
+        'epoch': epoch
     })
 
+@web_app.route('/api/changes')
+def get_changes_api():
+    epoch, since = parse_cursor(request.args.get('since'), request.args.get('epoch'))
+    delta = load_change_feed().since(since, epoch)
+    return jsonify(delta)
+
+@web_app.route('/api/changes/stream')
+def stream_changes_api():
+    epoch, since = parse_cursor(
+        request.headers.get('Last-Event-ID', request.args.get('since')),
+        request.args.get('epoch')
+    )
+    # Bounded so a connection doesn't pin an input until the function timeout;
+    # the browser reconnects from the last event ID
+    stream = sse_stream(
+        lambda version, epoch: load_change_feed().since(version, epoch),
+        wait_for_volume_changes,
+        epoch,
+        since,
+        max_duration=STREAM_MAX_DURATION
+    )
+    return Response(
+        stream,
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @web_app.route('/api/saved')
 def get_saved_api():
     articles = load_articles()
@@ -126,21 +281,63 @@ def get_saved_api():
         'total': len(saved_articles)
     })
 
+def flush_saved_operations(operations):
+    # Read-modify-write of the saved set, stats and change feed: start from the
+    # latest committed state so a scrape committed meanwhile isn't overwritten.
+    # If the reload fails, apply the batch to this container's last view rather
+    # than failing every request in it.
+    if not reload_volume():
+        print("Applying saved operations without a fresh volume reload")
+    saved_ids = load_saved_ids()
+    added, removed = apply_operations(saved_ids, operations)
+    if added or removed:
+        feed = load_change_feed()
+        stats = load_or_rebuild_stats(feed.version)
+        article_ids = {a.get('id', a.get('url')) for a in load_articles()}
+        stats.mark_saved(len(added & article_ids) - len(removed & article_ids))
+        feed.record_saved(added, removed)
+        save_saved_ids(saved_ids, stats, feed)
+    return len(saved_ids)
+
+# Clicks and batches that arrive together share one volume.commit()
+saved_writer = WriteCoalescer(flush_saved_operations)
+
 @web_app.route('/api/save/<article_id>', methods=['POST'])
 def save_article(article_id):
-    saved_ids = load_saved_ids()
-    saved_ids.add(article_id)
-    save_saved_ids(saved_ids)
+    saved_writer.submit([('add', article_id)])
     return jsonify({'status': 'success', 'saved': True})
 
 @web_app.route('/api/unsave/<article_id>', methods=['POST'])
 def unsave_article(article_id):
-    saved_ids = load_saved_ids()
-    if article_id in saved_ids:
-        saved_ids.remove(article_id)
-        save_saved_ids(saved_ids)
+    saved_writer.submit([('remove', article_id)])
     return jsonify({'status': 'success', 'saved': False})
 
+@web_app.route('/api/saved/batch', methods=['POST'])
+def batch_saved_api():
+    try:
+        operations = parse_operations(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    total_saved = saved_writer.submit(operations)
+    return jsonify({
+        'status': 'success',
+        'applied': len(operations),
+        'total_saved': total_saved
+    })
+
+@web_app.route('/api/stats')
+def get_stats_api():
+    return jsonify(load_or_rebuild_stats(load_change_feed().version).to_dict())
+
+@web_app.route('/api/saved/export')
+def export_saved_api():
+    saved_ids = load_saved_ids()
+    return jsonify({
+        'saved_ids': sorted(saved_ids),
+        'total': len(saved_ids)
+    })
+
 @web_app.route('/api/scrape', methods=['POST'])
 def trigger_scrape():
     # Trigger the modal function asynchronously
@@ -148,64 +345,104 @@ def trigger_scrape():
     return jsonify({'status': 'started', 'message': 'Scraping started in background'})
 
 # --- Scraper Logic ---
-def run_scraper_logic():
-    print("Running scraper logic...")
-    sys.path.append("/root/tools")
-    
-    # Import locally
-    try:
-        from scraper_bens_bites import scrape_bens_bites
-        from scraper_ai_rundown import scrape_ai_rundown
-        from scraper_reddit import scrape_reddit
-    except ImportError as e:
-        print(f"Import error: {e}")
-        return
+# Per-source limits. Worst case per source is two 120 s attempts plus a 5 s
+# backoff; the reducer's timeout leaves room for that plus the final write.
+SOURCE_TIMEOUT = 120
+SOURCE_RETRIES = modal.Retries(max_retries=1, initial_delay=5.0, backoff_coefficient=2.0)
+REDUCER_TIMEOUT = 600
 
+# Source key -> (display name, module, function) for the fan-out workers
+SCRAPERS = {
+    'bens_bites': ('Ben\'s Bites', 'scraper_bens_bites', 'scrape_bens_bites'),
+    'ai_rundown': ('AI Rundown', 'scraper_ai_rundown', 'scrape_ai_rundown'),
+    'reddit': ('Reddit', 'scraper_reddit', 'scrape_reddit'),
+}
+
+def save_articles(articles, stats, feed):
+    """Write the article cache, stats, change feed and ranking, then commit the volume once"""
+    ensure_dirs()
+    path = get_data_path()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(articles, f, indent=2)
+    os.replace(tmp_path, path)
+    write_stats(stats, feed)
+    write_change_feed(feed)
+    with open(get_ranking_path(), 'w') as f:
+        json.dump(build_ranking_index(articles), f)
+    volume.commit()
+
+def merge_scrape_results(results, existing):
+    """Merge per-source results, dedupe by URL and keep unre-scraped articles"""
     all_articles = []
-    sources = [
-        ('Ben\'s Bites', scrape_bens_bites),
-        ('AI Rundown', scrape_ai_rundown),
-        ('Reddit', scrape_reddit)
-    ]
-    
-    for source_name, scraper_func in sources:
-        try:
-            print(f"Scraping {source_name}...")
-            result = scraper_func()
-            articles = result.get('articles', [])
-            for i, article in enumerate(articles):
-                article['id'] = f"{result['source']}_{i}_{hash(article['url'])}"
-                article['source'] = result['source']
-            all_articles.extend(articles)
-        except Exception as e:
-            print(f"Error: {e}")
+    for result in results:
+        if isinstance(result, BaseException):
+            print(f"Error: {result}")
+            continue
+        articles = result.get('articles', [])
+        for i, article in enumerate(articles):
+            article['id'] = f"{result['source']}_{i}_{hash(article['url'])}"
+            article['source'] = result['source']
+        all_articles.extend(articles)
+        print(f"Found {len(articles)} articles from {result['source']}")
 
-    # Dedup
     seen_urls = set()
     unique_articles = []
-    for article in all_articles:
+    for article in all_articles + existing:
         if article['url'] not in seen_urls:
             seen_urls.add(article['url'])
             unique_articles.append(article)
+    return unique_articles
 
-    # Save
-    ensure_dirs()
-    with open(get_data_path(), 'w') as f:
-        json.dump(unique_articles, f, indent=2)
-    volume.commit()
+def run_scraper_logic():
+    print("Running scraper logic...")
+
+    # One container per source; a failed or timed-out source comes back as an exception
+    results = list(scrape_source.map(list(SCRAPERS), return_exceptions=True))
+
+    # Single reducer write: pick up any writes made since this container started
+    volume.reload()
+    feed = load_change_feed()
+    stats = load_or_rebuild_stats(feed.version)
+    existing = load_articles()
+    unique_articles = merge_scrape_results(results, existing)
+    saved_ids = load_saved_ids()
+    changed = update_for_ingest(stats, existing, unique_articles, saved_ids)
+    feed.record_articles(changed, saved_ids)
+    save_articles(unique_articles, stats, feed)
     print(f"Saved {len(unique_articles)} articles.")
 
 # --- Modal Functions ---
 
-@app.function(image=image, schedule=modal.Period(hours=24), volumes={"/data": volume})
+@app.function(image=image, timeout=SOURCE_TIMEOUT, retries=SOURCE_RETRIES)
+def scrape_source(source_key):
+    """Run a single source's scraper; results are merged by run_scraper_logic"""
+    sys.path.append("/root/tools")
+    source_name, module_name, func_name = SCRAPERS[source_key]
+    print(f"Scraping {source_name}...")
+    module = importlib.import_module(module_name)
+    result = getattr(module, func_name)()
+    # The scrapers log and swallow request errors, returning no articles. Every
+    # source lists at least one post when it loads, so treat that as a failure
+    # and raise: Modal then retries it, and the reducer keeps this source's
+    # stored articles instead of merging an empty result.
+    if not result.get('articles'):
+        raise RuntimeError(f"{source_name} returned no articles")
+    return result
+
+@app.function(image=image, schedule=modal.Period(hours=24), volumes={"/data": volume}, timeout=REDUCER_TIMEOUT)
 def scheduled_scrape():
     run_scraper_logic()
 
-@app.function(image=image, volumes={"/data": volume})
+@app.function(image=image, volumes={"/data": volume}, timeout=REDUCER_TIMEOUT)
 def manual_scrape():
     run_scraper_logic()
 
 @app.function(image=image, volumes={"/data": volume})
+# Many concurrent requests per container: open change streams don't each pin
+# a container, and bursts of save clicks can share one coalesced commit
+@modal.concurrent(max_inputs=100)
 @modal.wsgi_app()
 def flask_app():
+    build_assets("/root", STATIC_BUILD_DIR)
     return web_app
@@ -3,7 +3,6 @@ from modal.volume import Volume
 import sys
 import os
 import json
-from datetime import datetime
 
 # Define Modal App
 app = modal.App("ai-news-scraper")
@@ -2,27 +2,47 @@
 Flask Server for AI News Dashboard
 Serves the dashboard and provides API endpoints
 """
-from flask import Flask, jsonify, send_from_directory, request
+from flask import Flask, jsonify, request, Response
 from flask_cors import CORS
 import json
 import os
 from datetime import datetime
 import sys
 import re
+import threading
 
 # Add tools directory to path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'tools'))
 
-from scraper_bens_bites import scrape_bens_bites
-from scraper_ai_rundown import scrape_ai_rundown
+from scraper_bens_bites import scrape_bens_bites, backfill_bens_bites
+from scraper_ai_rundown import scrape_ai_rundown, backfill_ai_rundown
 from scraper_reddit import scrape_reddit
+from write_coalescer import WriteCoalescer, parse_operations, apply_operations
+from article_stats import ArticleStats, update_for_ingest
+from change_feed import ChangeFeed, parse_cursor, sse_stream
+from static_assets import build_assets, send_html, send_asset
+from ranking import SORTS, articles_fingerprint, build_ranking_index, ranked_slice, parse_slice
 
-app = Flask(__name__, static_folder='.')
+app = Flask(__name__, static_folder=None)
 CORS(app)
 
+# Fingerprinted, precompressed dashboard assets are built here on startup
+STATIC_BUILD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.tmp', 'static')
+
 # In-memory storage for articles and saved items
 articles_db = []
 saved_articles = set()
+# Dashboard counters, updated on ingest and save/unsave
+stats = ArticleStats()
+# Versioned log of article and save-state changes for /api/changes
+change_feed = ChangeFeed()
+# Precomputed trending/recent orderings and the fingerprint of articles_db,
+# replaced together with articles_db after each ingest
+ranking_index = {}
+articles_db_fingerprint = ''
+articles_lock = threading.Lock()
+# Scrape and backfill merge into articles_db one at a time
+ingest_lock = threading.Lock()
 
 def load_cached_articles():
     """Load articles from cache file if exists"""
@@ -74,6 +94,19 @@ def save_saved_articles():
     except Exception as e:
         print(f"Error saving saved articles: {e}")
 
+def rebuild_stats():
+    """Recompute the stats counters from the loaded articles (startup only)"""
+    global stats
+    stats = ArticleStats.from_articles(articles_db, saved_articles)
+
+def publish_articles(articles):
+    """Replace articles_db, hashing it and ranking it once for all later reads"""
+    global articles_db, articles_db_fingerprint, ranking_index
+    fingerprint = articles_fingerprint(articles)
+    index = build_ranking_index(articles, fingerprint=fingerprint)
+    with articles_lock:
+        articles_db, articles_db_fingerprint, ranking_index = articles, fingerprint, index
+
 def save_article_details(article_id):
     """Save full article details to individual file"""
     # Find the article in the database
@@ -104,40 +137,56 @@ def delete_article_details(article_id):
     try:
         if os.path.exists(article_file):
             os.remove(article_file)
-            print(f"Deleted article details file")
+            print("Deleted article details file")
     except Exception as e:
         print(f"Error deleting article details: {e}")
 
-@app.route('/')
-def index():
-    """Serve the dashboard HTML"""
-    return send_from_directory('.', 'dashboard.html')
-
-@app.route('/dashboard.css')
-def serve_css():
-    """Serve the CSS file"""
-    return send_from_directory('.', 'dashboard.css')
+def flush_saved_operations(operations):
+    """Apply queued save/unsave operations with a single persistence write"""
+    added, removed = apply_operations(saved_articles, operations)
+    if added or removed:
+        article_ids = {a.get('id', a.get('url')) for a in articles_db}
+        stats.mark_saved(len(added & article_ids) - len(removed & article_ids))
+        change_feed.record_saved(added, removed)
+        save_saved_articles()  # Persist to file
+        for article_id in added:
+            save_article_details(article_id)  # Save full article details
+        for article_id in removed:
+            delete_article_details(article_id)  # Delete article details file
+    return len(saved_articles)
 
-@app.route('/dashboard.js')
-def serve_js():
-    """Serve the JavaScript file"""
-    return send_from_directory('.', 'dashboard.js')
+# Bursts of save/unsave clicks and batch requests share one write
+saved_writer = WriteCoalescer(flush_saved_operations)
 
-@app.route('/date-picker.css')
-def serve_date_picker_css():
-    """Serve the date picker CSS file"""
-    return send_from_directory('.', 'date-picker.css')
+@app.route('/')
+def index():
+    """Serve the dashboard HTML (with fingerprinted asset references)"""
+    return send_html(STATIC_BUILD_DIR)
 
-@app.route('/date-picker.js')
-def serve_date_picker_js():
-    """Serve the date picker JavaScript file"""
-    return send_from_directory('.', 'date-picker.js')
+@app.route('/assets/<path:filename>')
+def serve_asset(filename):
+    """Serve fingerprinted CSS/JS, precompressed when the client accepts it"""
+    return send_asset(STATIC_BUILD_DIR, filename, request.headers.get('Accept-Encoding', ''))
 
 @app.route('/api/articles')
 def get_articles():
-    """Get all articles with saved status"""
+    """Get all articles with saved status, optionally ranked (?sort=trending|recent&offset=M&limit=N)"""
+    sort = request.args.get('sort')
+    if sort is not None and sort not in SORTS:
+        return jsonify({'status': 'error', 'message': f"sort must be one of: {', '.join(SORTS)}"}), 400
+    try:
+        offset, limit = parse_slice(request.args.get('offset'), request.args.get('limit'))
+    except ValueError:
+        return jsonify({'status': 'error', 'message': 'offset and limit must be non-negative integers'}), 400
+
+    # Read the version first so clients replay anything that lands meanwhile
+    epoch, version = change_feed.epoch, change_feed.version
+    with articles_lock:
+        articles, fingerprint, index = articles_db, articles_db_fingerprint, ranking_index
+    articles = ranked_slice(articles, index, sort, offset, limit, fingerprint)
+
     articles_with_saved = []
-    for article in articles_db:
+    for article in articles:
         article_copy = article.copy()
         article_copy['is_saved'] = article.get('id', article.get('url')) in saved_articles
         articles_with_saved.append(article_copy)
@@ -145,13 +194,34 @@ def get_articles():
     return jsonify({
         'articles': articles_with_saved,
         'last_updated': datetime.now().isoformat(),
-        'total': len(articles_with_saved)
+        'total': len(articles_with_saved),
+        'version': version,
+        'epoch': epoch
     })
 
+@app.route('/api/changes')
+def get_changes():
+    """Get articles inserted/updated and save-state changes since a version"""
+    epoch, since = parse_cursor(request.args.get('since'), request.args.get('epoch'))
+    return jsonify(change_feed.since(since, epoch))
+
+@app.route('/api/changes/stream')
+def stream_changes():
+    """Server-Sent Events stream of the change feed"""
+    # EventSource sends Last-Event-ID ("<epoch>:<version>") when it reconnects
+    epoch, since = parse_cursor(
+        request.headers.get('Last-Event-ID', request.args.get('since')),
+        request.args.get('epoch')
+    )
+    return Response(
+        sse_stream(change_feed.since, change_feed.wait, epoch, since),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/api/scrape', methods=['POST'])
 def scrape_all():
     """Trigger scraping from all sources"""
-    global articles_db
     
     print("Starting scrape...")
     all_articles = []
@@ -187,31 +257,133 @@ def scrape_all():
             seen_urls.add(article['url'])
             unique_articles.append(article)
     
-    articles_db = unique_articles
-    save_articles_cache()
+    with ingest_lock:
+        known_urls = {article['url'] for article in articles_db}
+        new_count = sum(1 for article in unique_articles if article['url'] not in known_urls)
+
+        # Keep previously stored (e.g. backfilled) articles that were not re-scraped
+        unique_articles.extend(a for a in articles_db if a['url'] not in seen_urls)
+
+        changed = update_for_ingest(stats, articles_db, unique_articles, saved_articles)
+        publish_articles(unique_articles)
+        save_articles_cache()
+        change_feed.record_articles(changed, saved_articles)
     
     return jsonify({
         'status': 'success',
-        'articles_found': len(unique_articles),
+        'articles_found': new_count,
+        'scraped_at': datetime.now().isoformat()
+    })
+
+def is_positive_int(value):
+    # bool is an int subclass, but true/false are not page counts
+    return isinstance(value, int) and not isinstance(value, bool) and value > 0
+
+@app.route('/api/backfill', methods=['POST'])
+def backfill_all():
+    """Load the newsletter back catalogue, resuming any interrupted run"""
+
+    body = request.get_json(silent=True) or {}
+    max_pages = body.get('max_pages')
+    max_workers = body.get('max_workers', 4)
+    if max_pages is not None and not is_positive_int(max_pages):
+        return jsonify({'status': 'error', 'message': 'max_pages must be a positive integer'}), 400
+    if not is_positive_int(max_workers):
+        return jsonify({'status': 'error', 'message': 'max_workers must be a positive integer'}), 400
+
+    print("Starting backfill...")
+    known_urls = {article['url'] for article in articles_db}
+    results = []
+    incomplete = []
+
+    sources = [
+        ('Ben\'s Bites', backfill_bens_bites),
+        ('AI Rundown', backfill_ai_rundown)
+    ]
+
+    for source_name, backfill_func in sources:
+        try:
+            print(f"Backfilling {source_name}...")
+            result = backfill_func(known_urls=known_urls, max_pages=max_pages, max_workers=max_workers)
+            results.append(result)
+            if not result.get('complete'):
+                incomplete.append(result['source'])
+            print(f"Backfilled {len(result.get('articles', []))} articles from {source_name}")
+        except Exception as e:
+            print(f"Error backfilling {source_name}: {e}")
+            incomplete.append(source_name)
+
+    # A scrape may have stored some of these URLs while the backfill ran
+    with ingest_lock:
+        known_urls = {article['url'] for article in articles_db}
+        new_articles = []
+        for result in results:
+            articles = []
+            for article in result.get('articles', []):
+                if article['url'] not in known_urls:
+                    known_urls.add(article['url'])
+                    articles.append(article)
+
+            # Continue numbering after the existing articles so IDs stay unique
+            offset = len(articles_db) + len(new_articles)
+            for i, article in enumerate(articles):
+                article['id'] = f"{result['source']}_{offset + i}_{hash(article['url'])}"
+                article['source'] = result['source']
+            new_articles.extend(articles)
+
+        for article in new_articles:
+            stats.add(article, article['id'] in saved_articles)
+        publish_articles(articles_db + new_articles)
+        save_articles_cache()
+        change_feed.record_articles(new_articles, saved_articles)
+
+    return jsonify({
+        'status': 'success' if not incomplete else 'partial',
+        'articles_found': len(new_articles),
+        'incomplete_sources': incomplete,
         'scraped_at': datetime.now().isoformat()
     })
 
 @app.route('/api/save/<article_id>', methods=['POST'])
 def save_article(article_id):
     """Save an article"""
-    saved_articles.add(article_id)
-    save_saved_articles()  # Persist to file
-    save_article_details(article_id)  # Save full article details
+    saved_writer.submit([('add', article_id)])
     return jsonify({'status': 'success', 'saved': True})
 
 @app.route('/api/unsave/<article_id>', methods=['POST'])
 def unsave_article(article_id):
     """Unsave an article"""
-    saved_articles.discard(article_id)
-    save_saved_articles()  # Persist to file
-    delete_article_details(article_id)  # Delete article details file
+    saved_writer.submit([('remove', article_id)])
     return jsonify({'status': 'success', 'saved': False})
 
+@app.route('/api/saved/batch', methods=['POST'])
+def batch_saved_articles():
+    """Apply a list of save/unsave operations with one write"""
+    try:
+        operations = parse_operations(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    total_saved = saved_writer.submit(operations)
+    return jsonify({
+        'status': 'success',
+        'applied': len(operations),
+        'total_saved': total_saved
+    })
+
+@app.route('/api/saved/export')
+def export_saved_articles():
+    """Export the saved set; import it again via /api/saved/batch"""
+    return jsonify({
+        'saved_ids': sorted(saved_articles),
+        'total': len(saved_articles)
+    })
+
+@app.route('/api/stats')
+def get_stats():
+    """Get article counts per source, saved, per day and per subreddit"""
+    return jsonify(stats.to_dict())
+
 @app.route('/api/saved')
 def get_saved_articles():
     """Get all saved articles"""
@@ -234,17 +406,27 @@ if __name__ == '__main__':
     load_cached_articles()
     # Load saved articles from persistent storage
     load_saved_articles()
+    rebuild_stats()
+    publish_articles(articles_db)
+    # Build hashed + gzip/brotli copies of the CSS/JS
+    build_assets(os.path.dirname(os.path.abspath(__file__)), STATIC_BUILD_DIR)
     
     print("=" * 60)
     print("🚀 AI News Dashboard Server Starting...")
     print("=" * 60)
     print("📍 Dashboard URL: http://localhost:5000")
     print("📡 API Endpoints:")
-    print("   - GET  /api/articles     - Get all articles")
+    print("   - GET  /api/articles     - Get all articles (?sort=trending|recent)")
     print("   - POST /api/scrape       - Trigger scraping")
+    print("   - POST /api/backfill     - Load newsletter archives")
     print("   - POST /api/save/<id>    - Save article")
     print("   - POST /api/unsave/<id>  - Unsave article")
     print("   - GET  /api/saved        - Get saved articles")
+    print("   - GET  /api/stats        - Get article statistics")
+    print("   - GET  /api/changes      - Get changes since a version")
+    print("   - GET  /api/changes/stream - Server-Sent Events change feed")
+    print("   - POST /api/saved/batch  - Save/unsave in bulk")
+    print("   - GET  /api/saved/export - Export saved article IDs")
     print("=" * 60)
     print("\n💡 Open http://localhost:5000 in your browser\n")
     
@@ -0,0 +1,115 @@
+"""
+Article Statistics
+Counters for the dashboard stats panel, kept up to date on ingest and
+save/unsave so /api/stats never has to scan the article list
+"""
+from collections import Counter
+
+def _bump(counter, key, delta):
+    counter[key] += delta
+    if counter[key] <= 0:
+        del counter[key]
+
+def _day(article):
+    # published_at is an ISO timestamp; the date part is the histogram bucket
+    return (article.get('published_at') or '')[:10] or 'unknown'
+
+class ArticleStats:
+    """Incrementally maintained article counts, serialisable with to_dict()"""
+
+    def __init__(self, data=None):
+        data = data or {}
+        self.total = data.get('total', 0)
+        self.saved = data.get('saved', 0)
+        self.by_source = Counter(data.get('by_source', {}))
+        self.by_day = Counter(data.get('by_day', {}))
+        self.by_source_day = {
+            source: Counter(days) for source, days in data.get('by_source_day', {}).items()
+        }
+        self.by_subreddit = Counter(data.get('by_subreddit', {}))
+
+    @classmethod
+    def from_articles(cls, articles, saved_ids):
+        """Build the counters from scratch (startup or missing stats file)"""
+        stats = cls()
+        for article in articles:
+            stats.add(article, article.get('id', article.get('url')) in saved_ids)
+        return stats
+
+    def _apply(self, article, delta, saved):
+        source = article.get('source', 'unknown')
+        day = _day(article)
+
+        self.total += delta
+        if saved:
+            self.saved += delta
+        _bump(self.by_source, source, delta)
+        _bump(self.by_day, day, delta)
+        _bump(self.by_source_day.setdefault(source, Counter()), day, delta)
+        if not self.by_source_day[source]:
+            del self.by_source_day[source]
+
+        subreddit = (article.get('metadata') or {}).get('subreddit')
+        if subreddit:
+            _bump(self.by_subreddit, subreddit, delta)
+
+    def add(self, article, saved=False):
+        self._apply(article, 1, saved)
+
+    def remove(self, article, saved=False):
+        self._apply(article, -1, saved)
+
+    def replace(self, old, new, old_saved=False, new_saved=False):
+        """Account for an article that was re-scraped or updated in place"""
+        self.remove(old, old_saved)
+        self.add(new, new_saved)
+
+    def mark_saved(self, delta):
+        self.saved += delta
+
+    def to_dict(self):
+        return {
+            'total': self.total,
+            'saved': self.saved,
+            'by_source': dict(self.by_source),
+            'by_day': dict(self.by_day),
+            'by_source_day': {source: dict(days) for source, days in self.by_source_day.items()},
+            'by_subreddit': dict(self.by_subreddit)
+        }
+
+# Fields that make an article "changed" for the change feed. id is included:
+# clients save and unsave by id, so they need the new one. published_at is left
+# out because newsletters stamp the scrape time on every re-scrape.
+CONTENT_FIELDS = ('id', 'title', 'summary', 'source', 'metadata')
+
+def _content(article):
+    return tuple(article.get(field) for field in CONTENT_FIELDS)
+
+def update_for_ingest(stats, old_articles, new_articles, saved_ids):
+    """
+    Update stats for a new article list, touching only articles that were
+    inserted, changed or dropped (matched by URL). Returns the articles that
+    are new or whose content changed.
+    """
+    old_by_url = {a['url']: a for a in old_articles}
+    new_urls = set()
+    changed = []
+
+    for article in new_articles:
+        new_urls.add(article['url'])
+        new_saved = article.get('id', article.get('url')) in saved_ids
+        old = old_by_url.get(article['url'])
+        if old is None:
+            stats.add(article, new_saved)
+            changed.append(article)
+        elif old is not article and old != article:
+            old_saved = old.get('id', old.get('url')) in saved_ids
+            stats.replace(old, article, old_saved, new_saved)
+            if _content(old) != _content(article):
+                changed.append(article)
+
+    for url, old in old_by_url.items():
+        if url not in new_urls:
+            stats.remove(old, old.get('id', old.get('url')) in saved_ids)
+
+    return changed
@@ -0,0 +1,212 @@
+"""
+Newsletter Backfill Crawler
+Walks newsletter archive pages with a bounded worker pool and checkpoints
+progress so an interrupted backfill resumes where it stopped
+"""
+import requests
+from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import json
+import os
+import re
+import time
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+CHECKPOINT_DIR = '.tmp/backfill'
+
+def get_checkpoint_path(source, checkpoint_dir=CHECKPOINT_DIR):
+    return os.path.join(checkpoint_dir, f'{source}.json')
+
+def load_checkpoint(source, checkpoint_dir=CHECKPOINT_DIR):
+    """Load backfill progress for a source, or a fresh state"""
+    path = get_checkpoint_path(source, checkpoint_dir)
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Error loading checkpoint for {source}: {e}")
+    return {'next_page': 1, 'articles': [], 'failed': [], 'full_pass_done': False}
+
+def save_checkpoint(source, state, checkpoint_dir=CHECKPOINT_DIR):
+    """Atomically persist backfill progress for a source"""
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    path = get_checkpoint_path(source, checkpoint_dir)
+    tmp_path = f'{path}.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"Error saving checkpoint for {source}: {e}")
+
+def fetch_archive_page(base_url, page):
+    """Return the issue URLs listed on one archive page, in page order"""
+    response = requests.get(f"{base_url}/archive?page={page}", headers=HEADERS, timeout=10)
+    response.raise_for_status()
+
+    soup = BeautifulSoup(response.content, 'html.parser')
+
+    issue_urls = []
+    for link in soup.find_all('a', href=re.compile(r'^(/p/|' + re.escape(base_url) + r'/p/)')):
+        issue_url = link['href']
+        if issue_url.startswith('/'):
+            issue_url = f"{base_url}{issue_url}"
+        if issue_url not in issue_urls:
+            issue_urls.append(issue_url)
+    return issue_urls
+
+def fetch_issue(issue_url, author, tags):
+    """Fetch a single issue page and build an article record"""
+    response = requests.get(issue_url, headers=HEADERS, timeout=10)
+    response.raise_for_status()
+
+    soup = BeautifulSoup(response.content, 'html.parser')
+
+    def meta(*names):
+        for name in names:
+            elem = soup.find('meta', attrs={'property': name}) or soup.find('meta', attrs={'name': name})
+            if elem and elem.get('content'):
+                return elem['content'].strip()
+        return None
+
+    title = meta('og:title', 'twitter:title')
+    if not title:
+        heading = soup.find(['h1', 'h2'])
+        title = heading.get_text(strip=True) if heading else issue_url
+
+    summary = meta('og:description', 'description') or title
+
+    # Fall back to the <time> tag, then to now, when the page has no publish date
+    published_at = meta('article:published_time')
+    if not published_at:
+        time_elem = soup.find('time', attrs={'datetime': True})
+        published_at = time_elem['datetime'] if time_elem else datetime.now().isoformat()
+
+    return {
+        'title': title,
+        'url': issue_url,
+        'summary': summary[:300],
+        'published_at': published_at,
+        'metadata': {
+            'author': author,
+            'tags': tags
+        }
+    }
+
+def backfill_newsletter(source, base_url, author, tags, known_urls=None, max_pages=None,
+                        max_workers=4, delay=1.0, checkpoint_dir=CHECKPOINT_DIR):
+    """
+    Walk a newsletter archive from the newest page backwards.
+
+    Archive pages are fetched ``max_workers`` at a time and their unseen
+    issues are fetched on the same pool. Progress is checkpointed after each
+    window, and issues that failed to load are kept in the checkpoint and
+    retried on the next run. ``max_pages`` caps the pages walked by this run.
+    Until a full pass has reached the end of the archive, runs resume where
+    the last one stopped; after that, runs start from page 1 and stop at the
+    first archive page whose issues are all already known.
+    """
+    known_urls = set(known_urls or [])
+    state = load_checkpoint(source, checkpoint_dir)
+    full_pass_done = state.get('full_pass_done', False)
+    page = 1 if full_pass_done else state.get('next_page', 1)
+    last_page = None if max_pages is None else page + max_pages - 1
+    articles = state.get('articles', [])
+    failed = [u for u in state.get('failed', []) if u not in known_urls]
+    seen_urls = known_urls | {a['url'] for a in articles} | set(failed)
+
+    if page > 1:
+        print(f"Resuming {source} backfill at archive page {page} ({len(articles)} articles pending)")
+
+    def checkpoint(next_page):
+        save_checkpoint(source, {
+            'next_page': next_page,
+            'articles': articles,
+            'failed': failed,
+            'full_pass_done': full_pass_done
+        }, checkpoint_dir)
+
+    def fetch_all(issue_urls):
+        """Fetch issues on the pool, recording the ones that fail in ``failed``"""
+        def safe_fetch(issue_url):
+            try:
+                return fetch_issue(issue_url, author, tags)
+            except Exception as e:
+                print(f"Error fetching issue {issue_url}: {e}")
+                return None
+
+        for issue_url, article in zip(issue_urls, pool.map(safe_fetch, issue_urls)):
+            if article:
+                articles.append(article)
+            elif issue_url not in failed:
+                failed.append(issue_url)
+
+    finished = False
+    reached_end = False
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        if failed:
+            print(f"Retrying {len(failed)} {source} issues that failed last time")
+            retry, failed = failed, []
+            fetch_all(retry)
+            checkpoint(page)
+
+        while not finished:
+            window = range(page, page + max_workers)
+            if last_page is not None:
+                window = range(page, min(page + max_workers, last_page + 1))
+            if not window:
+                break
+
+            try:
+                pages = list(pool.map(lambda p: fetch_archive_page(base_url, p), window))
+            except Exception as e:
+                # Keep the checkpoint at the start of this window so a rerun retries it
+                print(f"Error fetching {source} archive pages {window.start}-{window.stop - 1}: {e}")
+                checkpoint(page)
+                return {'source': source, 'scraped_at': datetime.now().isoformat(), 'articles': articles, 'complete': False}
+
+            new_urls = []
+            for issue_urls in pages:
+                if not issue_urls:
+                    finished = reached_end = True
+                    break
+                fresh = [u for u in issue_urls if u not in seen_urls]
+                new_urls.extend(fresh)
+                seen_urls.update(fresh)
+                if full_pass_done and not fresh:
+                    print(f"Reached already stored {source} issues, stopping early")
+                    finished = reached_end = True
+                    break
+
+            fetch_all(new_urls)
+
+            page = window.stop
+            if last_page is not None and page > last_page:
+                finished = True
+
+            checkpoint(page)
+            print(f"{source} backfill: archive pages up to {page - 1}, {len(articles)} new articles, {len(failed)} failed")
+
+            if not finished:
+                time.sleep(delay)
+
+    # The pending articles are handed to the caller, so they are dropped from the
+    # checkpoint. Failed issues stay in it and are retried on the next run.
+    complete = reached_end and not failed
+    if reached_end:
+        full_pass_done = True
+    articles_found, articles = articles, []
+    # Incremental runs always start from page 1; an unfinished first pass resumes
+    checkpoint(1 if full_pass_done else page)
+
+    return {
+        'source': source,
+        'scraped_at': datetime.now().isoformat(),
+        'articles': articles_found,
+        'complete': complete
+    }
@@ -0,0 +1,122 @@
+"""
+Change Feed
+Versioned log of inserted/updated articles and save-state changes, served
+as deltas (/api/changes) and as a Server-Sent Events stream
+"""
+from collections import deque
+import json
+import threading
+import time
+import uuid
+
+MAX_CHANGES = 500
+
+class ChangeFeed:
+    """
+    Append-only change log with a monotonically increasing version.
+
+    Versions are only meaningful within an ``epoch``, a random token chosen
+    when the log is created (per process for an in-memory log). Only the
+    newest ``max_changes`` entries are kept; a client that asks for changes
+    older than that, from a version this log never issued, or from another
+    epoch gets ``reset: True`` and should reload the full article list.
+    """
+
+    def __init__(self, data=None, max_changes=MAX_CHANGES):
+        data = data or {}
+        self.epoch = data.get('epoch') or uuid.uuid4().hex[:12]
+        self.version = data.get('version', 0)
+        self.changes = deque(data.get('changes', []), maxlen=max_changes)
+        self._cond = threading.Condition()
+
+    def _record(self, entries):
+        with self._cond:
+            for entry in entries:
+                self.version += 1
+                self.changes.append({'version': self.version, **entry})
+            self._cond.notify_all()
+
+    def record_articles(self, articles, saved_ids):
+        """Record inserted or updated articles, with their saved state"""
+        entries = []
+        for article in articles:
+            article_copy = article.copy()
+            article_copy['is_saved'] = article.get('id', article.get('url')) in saved_ids
+            entries.append({'type': 'article', 'article': article_copy})
+        self._record(entries)
+
+    def record_saved(self, added, removed):
+        """Record save-state changes for article IDs"""
+        entries = [{'type': 'saved', 'id': article_id, 'saved': True} for article_id in sorted(added)]
+        entries += [{'type': 'saved', 'id': article_id, 'saved': False} for article_id in sorted(removed)]
+        self._record(entries)
+
+    def since(self, version, epoch=None):
+        """Return the changes after ``version`` of ``epoch`` as a delta response"""
+        with self._cond:
+            oldest = self.changes[0]['version'] if self.changes else self.version + 1
+            # Version 0 means "from the start" and is valid in any epoch
+            stale_epoch = version > 0 and epoch != self.epoch
+            if stale_epoch or version > self.version or version < oldest - 1:
+                return {'epoch': self.epoch, 'version': self.version, 'changes': [], 'reset': True}
+            return {
+                'epoch': self.epoch,
+                'version': self.version,
+                'changes': [c for c in self.changes if c['version'] > version],
+                'reset': False
+            }
+
+    def wait(self, version, timeout):
+        """Block until there are changes after ``version`` or timeout expires"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.version != version, timeout=timeout)
+
+    def to_dict(self):
+        with self._cond:
+            return {'epoch': self.epoch, 'version': self.version, 'changes': list(self.changes)}
+
+def parse_cursor(value, epoch=None):
+    """
+    Parse a feed position from ?since=<version>&epoch=<epoch> or from an
+    SSE Last-Event-ID of the form "<epoch>:<version>". Missing or invalid
+    versions mean 0. Returns (epoch, version).
+    """
+    if isinstance(value, str) and ':' in value:
+        epoch, value = value.rsplit(':', 1)
+    try:
+        return epoch, max(int(value), 0)
+    except (TypeError, ValueError):
+        return epoch, 0
+
+def format_sse(event, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+def sse_stream(get_delta, wait, epoch, since, heartbeat=15, max_duration=None):
+    """
+    Yield Server-Sent Events for every change after ``since``.
+
+    ``get_delta(version, epoch)`` returns a ChangeFeed.since() style dict and
+    ``wait(version, timeout)`` blocks until new changes may be available.
+    Idle connections get a comment line every ``heartbeat`` seconds. With
+    ``max_duration`` the stream ends after that many seconds and the browser
+    reconnects from the last event ID.
+    """
+    deadline = None if max_duration is None else time.monotonic() + max_duration
+    version = since
+    while deadline is None or time.monotonic() < deadline:
+        delta = get_delta(version, epoch)
+        epoch = delta['epoch']
+        if delta['reset']:
+            version = delta['version']
+            yield format_sse('reset', {'epoch': epoch, 'version': version}, f"{epoch}:{version}")
+        for change in delta['changes']:
+            version = change['version']
+            yield format_sse('change', {**change, 'epoch': epoch}, f"{epoch}:{version}")
+        if not delta['changes'] and not delta['reset']:
+            yield ": keep-alive\n\n"
+        wait(version, heartbeat)
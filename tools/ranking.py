@@ -0,0 +1,130 @@
+"""
+Ranking Index
+Precomputes trending and recent orderings of the article list after each
+ingest, so /api/articles?sort=... only has to slice
+"""
+import numpy as np
+from datetime import datetime
+import hashlib
+import re
+
+SORTS = ('trending', 'recent')
+
+# Recency halves every day
+HALF_LIFE_HOURS = 24.0
+# Weight of per-subreddit normalised upvotes and of cross-source agreement
+UPVOTE_WEIGHT = 1.0
+AGREEMENT_WEIGHT = 0.5
+# Articles without upvotes (newsletters) get a neutral engagement score
+NEUTRAL_ENGAGEMENT = 0.5
+# Titles sharing this fraction of their keywords count as the same story
+AGREEMENT_THRESHOLD = 0.5
+# Only the newest articles are compared pairwise; older ones have decayed anyway
+AGREEMENT_WINDOW = 2000
+
+def _timestamp(article):
+    try:
+        return datetime.fromisoformat(article.get('published_at', '')).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+def _keywords(title):
+    return {w for w in re.findall(r'[a-z0-9]+', (title or '').lower()) if len(w) > 3}
+
+def _agreement(articles, candidates, source_codes, n_sources):
+    """Count, for each candidate, the other sources carrying a matching title"""
+    agreement = np.zeros(len(articles))
+    keyword_sets = [_keywords(articles[i].get('title')) for i in candidates]
+    vocabulary = {w: j for j, w in enumerate(set().union(*keyword_sets))}
+    if not vocabulary:
+        return agreement
+
+    # Article x keyword incidence matrix; overlaps come from one matrix product
+    incidence = np.zeros((len(candidates), len(vocabulary)), dtype=np.float32)
+    for row, words in enumerate(keyword_sets):
+        incidence[row, [vocabulary[w] for w in words]] = 1.0
+    sizes = incidence.sum(axis=1)
+    overlap = incidence @ incidence.T
+    union = sizes[:, None] + sizes[None, :] - overlap
+    same_story = overlap >= AGREEMENT_THRESHOLD * np.maximum(union, 1.0)
+
+    codes = source_codes[candidates]
+    same_story &= codes[:, None] != codes[None, :]
+    sources_per_article = same_story.astype(np.float32) @ np.eye(n_sources, dtype=np.float32)[codes]
+    agreement[candidates] = (sources_per_article > 0).sum(axis=1)
+    return agreement
+
+def articles_fingerprint(articles):
+    """Identify an article list by its URLs in order, so a reordered list is stale"""
+    digest = hashlib.sha1()
+    for article in articles:
+        digest.update(article['url'].encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+def parse_slice(offset, limit):
+    """Parse ?offset=&limit= query values; raises ValueError if invalid or negative"""
+    offset = int(offset) if offset not in (None, '') else 0
+    limit = int(limit) if limit not in (None, '') else None
+    if offset < 0 or (limit is not None and limit < 0):
+        raise ValueError("offset and limit must be non-negative integers")
+    return offset, limit
+
+def build_ranking_index(articles, now=None, fingerprint=None):
+    """
+    Score every article in one vectorised pass and return
+    {'fingerprint': ..., 'built_at': ..., 'trending': [...], 'recent': [...]}
+    where each ordering is a list of positions into ``articles``.
+    """
+    now = now or datetime.now()
+    n = len(articles)
+    fingerprint = fingerprint or articles_fingerprint(articles)
+    index = {'fingerprint': fingerprint, 'built_at': now.isoformat(), 'trending': [], 'recent': []}
+    if n == 0:
+        return index
+
+    published = np.array([_timestamp(a) for a in articles])
+    upvotes = np.array([float((a.get('metadata') or {}).get('upvotes') or 0) for a in articles])
+    has_upvotes = np.array(['upvotes' in (a.get('metadata') or {}) for a in articles])
+    groups = [(a.get('metadata') or {}).get('subreddit') or a.get('source', '') for a in articles]
+    _, group_codes = np.unique(groups, return_inverse=True)
+    _, source_codes = np.unique([a.get('source', '') for a in articles], return_inverse=True)
+
+    # Recency: exponential decay on age in hours
+    age_hours = np.maximum(now.timestamp() - published, 0.0) / 3600.0
+    recency = np.exp2(-age_hours / HALF_LIFE_HOURS)
+
+    # Engagement: log upvotes scaled by the busiest post in the same subreddit
+    log_upvotes = np.log1p(np.maximum(upvotes, 0.0))
+    group_max = np.zeros(group_codes.max() + 1)
+    np.maximum.at(group_max, group_codes, log_upvotes)
+    engagement = np.where(
+        has_upvotes,
+        log_upvotes / np.maximum(group_max[group_codes], 1e-9),
+        NEUTRAL_ENGAGEMENT
+    )
+
+    candidates = np.argsort(-published, kind='stable')[:AGREEMENT_WINDOW]
+    agreement = _agreement(articles, candidates, source_codes, source_codes.max() + 1)
+
+    score = recency * (1.0 + UPVOTE_WEIGHT * engagement) * (1.0 + AGREEMENT_WEIGHT * agreement)
+
+    index['trending'] = np.argsort(-score, kind='stable').tolist()
+    index['recent'] = np.argsort(-published, kind='stable').tolist()
+    return index
+
+def ranked_slice(articles, index, sort, offset=0, limit=None, fingerprint=None):
+    """
+    Return the top articles for ``sort`` straight from the index, or a slice
+    of the stored order when ``sort`` is None. Pass ``fingerprint`` if the
+    caller already has it for ``articles`` to skip hashing every URL.
+    """
+    end = None if limit is None else offset + limit
+    order = None
+    if sort:
+        fingerprint = fingerprint or articles_fingerprint(articles)
+        order = index.get(sort) if index.get('fingerprint') == fingerprint else None
+    if order is None:
+        # No sort, or the index is missing or stale; use stored order
+        return articles[offset:end]
+    return [articles[i] for i in order[offset:end]]
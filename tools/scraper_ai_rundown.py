@@ -8,6 +8,9 @@ from datetime import datetime
 import json
 import time
 import re
+import sys
+
+from backfill import backfill_newsletter
 
 def scrape_ai_rundown():
     """Scrape articles from The AI Rundown"""
@@ -98,6 +101,21 @@ def scrape_ai_rundown():
         'articles': articles
     }
 
+def backfill_ai_rundown(known_urls=None, max_pages=None, max_workers=4):
+    """Crawl The AI Rundown archive, skipping issues in known_urls"""
+    return backfill_newsletter(
+        'ai_rundown',
+        "https://www.therundown.ai",
+        'The AI Rundown',
+        ['AI', 'News', 'Technology'],
+        known_urls=known_urls,
+        max_pages=max_pages,
+        max_workers=max_workers
+    )
+
 if __name__ == '__main__':
-    result = scrape_ai_rundown()
+    if '--backfill' in sys.argv:
+        result = backfill_ai_rundown()
+    else:
+        result = scrape_ai_rundown()
     print(json.dumps(result, indent=2))
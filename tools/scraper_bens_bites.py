@@ -4,9 +4,12 @@ Scrapes latest AI news from Ben's Bites
 """
 import requests
 from bs4 import BeautifulSoup
-from datetime import datetime, timedelta
+from datetime import datetime
 import json
 import time
+import sys
+
+from backfill import backfill_newsletter
 
 def scrape_bens_bites():
     """Scrape articles from Ben's Bites"""
@@ -76,6 +79,21 @@ def scrape_bens_bites():
         'articles': articles
     }
 
+def backfill_bens_bites(known_urls=None, max_pages=None, max_workers=4):
+    """Crawl the Ben's Bites archive, skipping issues in known_urls"""
+    return backfill_newsletter(
+        'bens_bites',
+        "https://www.bensbites.co",
+        'Ben\'s Bites',
+        ['AI', 'News'],
+        known_urls=known_urls,
+        max_pages=max_pages,
+        max_workers=max_workers
+    )
+
 if __name__ == '__main__':
-    result = scrape_bens_bites()
+    if '--backfill' in sys.argv:
+        result = backfill_bens_bites()
+    else:
+        result = scrape_bens_bites()
     print(json.dumps(result, indent=2))
@@ -0,0 +1,143 @@
+"""
+Static Asset Pipeline
+Builds content-hashed copies of the dashboard CSS/JS with gzip and brotli
+variants, rewrites dashboard.html to reference them, and serves them with
+long-lived immutable caching
+"""
+from flask import abort, send_from_directory
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ASSETS = ['dashboard.css', 'date-picker.css', 'date-picker.js', 'dashboard.js']
+HTML_FILE = 'dashboard.html'
+ASSET_URL_PREFIX = '/assets/'
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+
+# Hashed filenames that may be served from each build directory
+_served_assets = {}
+
+def fingerprint(filename, content):
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    name, ext = os.path.splitext(filename)
+    return f"{name}.{digest}{ext}"
+
+def _write_atomic(path, data):
+    # A partly written file would otherwise be reused by the next build
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def build_assets(src_dir, out_dir):
+    """
+    Write fingerprinted assets, their .gz/.br variants and a rewritten
+    dashboard.html to out_dir. Returns the {original: hashed} manifest.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {}
+
+    for filename in ASSETS:
+        with open(os.path.join(src_dir, filename), 'rb') as f:
+            content = f.read()
+
+        hashed = fingerprint(filename, content)
+        manifest[filename] = hashed
+        out_path = os.path.join(out_dir, hashed)
+
+        # Hashed names never change content, so existing files can be reused.
+        # Each variant is checked on its own: an interrupted build or one run
+        # without brotli installed may have left only some of them.
+        variants = [(out_path, lambda: content),
+                    (f"{out_path}.gz", lambda: gzip.compress(content, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append((f"{out_path}.br", lambda: brotli.compress(content, quality=11)))
+        for path, encode in variants:
+            if not os.path.exists(path):
+                _write_atomic(path, encode())
+
+    with open(os.path.join(src_dir, HTML_FILE), 'r', encoding='utf-8') as f:
+        html = f.read()
+
+    for filename, hashed in manifest.items():
+        html = re.sub(
+            r'((?:href|src)=")' + re.escape(filename) + '"',
+            lambda m: f'{m.group(1)}{ASSET_URL_PREFIX}{hashed}"',
+            html
+        )
+
+    with open(os.path.join(out_dir, HTML_FILE), 'w', encoding='utf-8') as f:
+        f.write(html)
+    with open(os.path.join(out_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    _served_assets[out_dir] = set(manifest.values())
+    print(f"Built {len(manifest)} static assets in {out_dir}")
+    return manifest
+
+def send_html(out_dir):
+    """Serve the rewritten dashboard.html; it must be revalidated on each visit"""
+    response = send_from_directory(out_dir, HTML_FILE)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def served_assets(out_dir):
+    """Hashed asset names in out_dir, read from its manifest if not built here"""
+    if out_dir not in _served_assets:
+        try:
+            with open(os.path.join(out_dir, 'manifest.json'), 'r', encoding='utf-8') as f:
+                _served_assets[out_dir] = set(json.load(f).values())
+        except (OSError, ValueError):
+            return set()
+    return _served_assets[out_dir]
+
+def accepts_encoding(accept_encoding, coding):
+    """Whether an Accept-Encoding header allows ``coding`` (q=0 means refused)"""
+    qvalues = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qvalues[name] = q
+    if coding in qvalues:
+        return qvalues[coding] > 0
+    return qvalues.get('*', 0) > 0
+
+def send_asset(out_dir, filename, accept_encoding):
+    """Serve a fingerprinted asset, preferring a precompressed variant"""
+    # Only hashed assets are immutable; the HTML and manifest are not served here
+    if filename not in served_assets(out_dir):
+        abort(404)
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    encoding = None
+    for candidate, ext in (('br', '.br'), ('gzip', '.gz')):
+        if accepts_encoding(accept_encoding, candidate) and os.path.exists(os.path.join(out_dir, filename + ext)):
+            encoding = candidate
+            filename = filename + ext
+            break
+
+    response = send_from_directory(out_dir, filename, mimetype=mimetype)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE
+    return response
@@ -0,0 +1,90 @@
+"""
+Write Coalescer
+Group commit for save/unsave operations: concurrent callers that arrive
+within a short window share a single flush
+"""
+import threading
+import time
+
+class _Batch:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class WriteCoalescer:
+    """
+    Queue operations and apply them with one flush per batch.
+
+    The first caller of a batch waits ``window`` seconds for others to join,
+    then calls ``flush(operations)`` with everything queued so far. Every
+    caller in the batch blocks until that flush finishes and gets its result.
+    Flushes never overlap.
+    """
+
+    def __init__(self, flush, window=0.1):
+        self._flush = flush
+        self._window = window
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = []
+        self._batch = None
+
+    def submit(self, operations):
+        with self._lock:
+            self._pending.extend(operations)
+            batch = self._batch
+            is_leader = batch is None
+            if is_leader:
+                batch = self._batch = _Batch()
+
+        if is_leader:
+            time.sleep(self._window)
+            with self._flush_lock:
+                # Close the batch; later callers start the next one
+                with self._lock:
+                    operations, self._pending = self._pending, []
+                    self._batch = None
+                try:
+                    batch.result = self._flush(operations)
+                except Exception as e:
+                    batch.error = e
+                finally:
+                    batch.done.set()
+        else:
+            batch.done.wait()
+
+        if batch.error:
+            raise batch.error
+        return batch.result
+
+def parse_operations(body):
+    """
+    Validate a batch request body of the form
+    {"operations": [{"op": "add" | "remove", "id": "<article id>"}, ...]}.
+    Returns a list of (op, id) tuples or raises ValueError.
+    """
+    if not isinstance(body, dict) or not isinstance(body.get('operations'), list):
+        raise ValueError("Expected a JSON object with an 'operations' list")
+
+    operations = []
+    for item in body['operations']:
+        if not isinstance(item, dict) or item.get('op') not in ('add', 'remove'):
+            raise ValueError(f"Invalid operation: {item!r}")
+        if not isinstance(item.get('id'), str) or not item['id']:
+            raise ValueError(f"Operation is missing an article id: {item!r}")
+        operations.append((item['op'], item['id']))
+    return operations
+
+def apply_operations(saved_ids, operations):
+    """
+    Apply (op, id) operations in order to the saved set.
+    Returns the ids that ended up added and removed relative to the start.
+    """
+    before = set(saved_ids)
+    for op, article_id in operations:
+        if op == 'add':
+            saved_ids.add(article_id)
+        else:
+            saved_ids.discard(article_id)
+    return saved_ids - before, before - saved_ids